@@ -67,9 +67,10 @@ def update():
         data = bytearray(1024)
         with open(FILENAME, "wb") as f:
             while True:
-                if socket.readinto(data) == 0:
+                n = socket.readinto(data)
+                if n == 0:
                     break
-                f.write(data)
+                f.write(data[:n])
         socket.close()
         del data
         gc.collect()
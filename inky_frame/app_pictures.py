@@ -7,15 +7,13 @@
 """
 
 import jpegdec
-import sdcard
 import os
 import inky_frame
 import random
 import gc
 import time
 import app_state as sh
-
-from machine import Pin, SPI
+import sd_mount
 
 # The default update interval for this app in minutes.
 UPDATE_INTERVAL = 30
@@ -28,24 +26,26 @@ HEIGHT = None
 graphics = None
 j = None
 
-# Try to mount the SD card.
-sd_spi = SPI(0, sck=Pin(18, Pin.OUT), mosi=Pin(19, Pin.OUT), miso=Pin(16, Pin.OUT))
-sd = sdcard.SDCard(sd_spi, Pin(22))
-
-try:
-    os.mount(sd, "/sd")
-except Exception as e:
-    print(f"Error mounting SD card: {e}")
-    
-    sd = None
-
 # Variable for storing the image title.
 image_title = None
 
+# Accepted file extensions for JPEG images (compared in lower case).
+_JPG_EXTS = frozenset(("jpg", "jpeg"))
+
+# Cached list of JPEG files on the SD card. It only lasts until the next reset (every wake up from
+# sleep is a reset) and is rebuilt whenever a listed file can't be opened anymore.
+_files_cache = None
+
+# Method that shuffles a list in place (Fisher-Yates), MicroPython's random module has no shuffle().
+def shuffle(items):
+    for i in range(len(items) - 1, 0, -1):
+        k = random.randrange(i + 1)
+        items[i], items[k] = items[k], items[i]
+
 # Method to update images files from the SD card and handling errors.
 def update():
-    # Check if SD card is mounted.
-    if sd is None:
+    # Mount the SD card on first use and check if it is available.
+    if sd_mount.get_sd() is None:
         print("SD card not mounted.")
         return
     
@@ -65,7 +65,7 @@ def update():
 
 # Method that updates the images files from the SD card.
 def do_update():
-    global j, graphics
+    global j, graphics, _files_cache
     
     # Create a new JPEG decoder for our PicoGraphics.
     if j is None:
@@ -74,11 +74,26 @@ def do_update():
     # Free some more memory.
     gc.collect()
     
-    # Get a list of files that are in the directory.
-    files = os.listdir("/sd")
+    # Only scan the SD card if there is no listing yet.
+    if _files_cache is None:
+        files = []
+        
+        # Walk the directory once and keep only .jpgs or .jpegs (in any letter case).
+        for entry in os.ilistdir("/sd"):
+            name = entry[0]
+            dot = name.rfind(".")
+            
+            if dot < 0:
+                continue
+            
+            ext = name[dot + 1:]
+            
+            if len(ext) in (3, 4) and ext.lower() in _JPG_EXTS:
+                files.append(name)
+        
+        _files_cache = files
     
-    # remove files from the list that aren't .jpgs or .jpegs.
-    files = [f for f in files if f.endswith(".jpg") or f.endswith(".jpeg")]
+    files = _files_cache
     
     # Count number of files in root directory.
     file_count = len(files)
@@ -90,11 +105,40 @@ def do_update():
     else:
         print(f"Found {file_count} number of files.")
     
-    # pick a random file.
-    file = files[random.randrange(file_count)]
+    # Pick the next file of a shuffled play order, so no image repeats until all were shown.
+    # Every wake up is a reset, so the order is rebuilt from a seed and position kept in the app state.
+    seed = sh.state.get('pictures_seed')
+    pos = sh.state.get('pictures_pos', 0)
+    
+    if seed is None or pos >= file_count or sh.state.get('pictures_count') != file_count:
+        # Start a new order once all files were shown or the files on the SD card changed.
+        seed = random.getrandbits(30)
+        pos = 0
+    
+    order = sorted(files)
+    random.seed(seed)
+    shuffle(order)
+    
+    file = order[pos]
+    
+    # Don't show the last image of the previous order again as the first of a new one.
+    if file == sh.state.get('pictures_last') and pos + 1 < file_count:
+        pos += 1
+        file = order[pos]
+    
+    sh.state['pictures_seed'] = seed
+    sh.state['pictures_pos'] = pos + 1
+    sh.state['pictures_count'] = file_count
+    sh.state['pictures_last'] = file
+    sh.save_state(sh.state)
     
     # Open and decode the JPEG file.
-    j.open_file("/sd/" + file)
+    try:
+        j.open_file("/sd/" + file)
+    except OSError:
+        # The file was removed from the SD card, rescan it on the next update.
+        _files_cache = None
+        raise
         
     # Decode the JPEG.
     j.decode(0, 0, jpegdec.JPEG_SCALE_FULL)
@@ -109,11 +153,13 @@ def do_update():
     
     file_name = file_name.replace("_", " ")
     
-    # Print out the filename to the botton right.
+    # Print out the filename to the botton left, only clearing the area behind the text.
+    text_width = graphics.measure_text(file_name, 2)
+    
     graphics.set_pen(1)
-    graphics.rectangle(0, HEIGHT - 25, WIDTH, 25)
+    graphics.rectangle(0, HEIGHT - 25, min(WIDTH, text_width + 10), 25)
     graphics.set_pen(0)
-    graphics.text(str(file_name), 5, HEIGHT - 20, WIDTH, 2)
+    graphics.text(file_name, 5, HEIGHT - 20, WIDTH, 2)
 
 def draw():
     global image_title, graphics
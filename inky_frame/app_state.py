@@ -16,7 +16,7 @@
     - app: Reference to the currently loaded application module.
     
     Functions:
-    - file_exists(filename): Checks if a given file exists and is a regular file.
+    - state_file_exists(filename): Checks if a given file exists.
     - clear_state(): Deletes the state file if it exists.
     - save_state(data): Saves the given state data to a JSON file.
     - load_state(): Loads state data from the JSON file into the global state variable.
@@ -30,15 +30,23 @@ import json
 import micropython
 import gc
 
+from micropython import const
+
 # Global variable that stores the state of the application.
 state = {"run": None}
 
 # Global reference to the currently loaded application module.
 app = None
 
+# Application modules that have already been imported, by module name.
+_apps = {}
+
+# Last serialized state written to the state file, used to skip redundant writes.
+_last_serialized = None
+
 # Define day and night time intervals (24 h time interval).
-DAY_START = const(8)
-DAY_END = const(23)
+_DAY_START = const(8)
+_DAY_END = const(23)
 
 def get_app_update_interval(day_update_interval, night_update_interval):
     """
@@ -59,20 +67,21 @@ def get_app_update_interval(day_update_interval, night_update_interval):
     current_time = time.localtime()
     current_hour = current_time[3]
     
-    if DAY_START <= current_hour < DAY_END:
+    if _DAY_START <= current_hour < _DAY_END:
         return day_update_interval
     else:
         return night_update_interval
 
 def state_file_exists(filename):
     """
-    Checks if a file exists and is a regular file (not a directory).
+    Checks if a file exists.
     
     :param filename: The path to the file to check.
-    :return: True if the file exists and is a regular file, False otherwise.
+    :return: True if the file exists, False otherwise.
     """
     try:
-        return os.stat(filename)[0] & 0x8000  # Check for regular file (0x8000 indicates a regular file)
+        os.stat(filename)
+        return True
     except OSError:
         return False
 
@@ -80,30 +89,52 @@ def clear_state():
     """
     Deletes the state file if it exists.
     """
+    global _last_serialized
+
     if state_file_exists("/state.json"):
         os.remove("/state.json")
 
+    # The file is gone, so the next save must write even if the data matches the last written state.
+    _last_serialized = None
+
 def save_state(data):
     """
     Saves the given state data to a JSON file.
     
+    The data is written to a temporary file first and then renamed, so a crash during the write
+    never leaves a truncated state file behind. Nothing is written if the data did not change.
+    
     :param data: The state data to save, expected to be a dictionary.
     """
-    with open("/state.json", "w") as f:
-        f.write(json.dumps(data)) 
+    global _last_serialized
+    
+    serialized = json.dumps(data)
+    
+    if serialized == _last_serialized:
+        return
+    
+    with open("/state.json.tmp", "w") as f:
+        f.write(serialized)
+    
+    os.rename("/state.json.tmp", "/state.json")
+    
+    _last_serialized = serialized
 
 def load_state():
     """
     Loads the state data from the JSON file into the global state variable.
     If the file cannot be read or the data is invalid, initializes state with default values.
     """
-    global state
+    global state, _last_serialized
     try:
         with open("/state.json", "r") as f:
             data = json.loads(f.read())
         if isinstance(data, dict):
             state = data
-    except OSError:
+            
+            # Remember what is on flash, so saving the same state again after a reset is skipped.
+            _last_serialized = json.dumps(state)
+    except (OSError, ValueError):
         state = {"run": None}
 
 def update_state(running):
@@ -120,9 +151,17 @@ def launch_app(app_name):
     """
     Dynamically imports an application module and updates the state with the application name.
     
+    If the application module was already imported, the cached module is reused instead of importing it again.
+    
     :param app_name: The name of the application module to import.
     """
     global app
+    
+    if app_name in _apps:
+        app = _apps[app_name]
+        update_state(app_name)
+        return
+    
     try:
         # Show memory info before import.
         micropython.mem_info()
@@ -136,6 +175,7 @@ def launch_app(app_name):
         
         # Import the application module.
         app = __import__(app_name)
+        _apps[app_name] = app
         
         # Print the imported module for debugging.
         print(app)
@@ -29,18 +29,50 @@ import jpegdec
 import os
 import inky_frame
 import urequests
+import ujson
 import gc
 import app_state as sh
 
+from micropython import const
 from machine import Pin, SPI, ADC
 from config import API_KEY, LOCATION_NAME, LAT, LON, LANG, UNIT
 
 # The default update interval for this app in minutes.
-UPDATE_INTERVAL = 30
+_UPDATE_INTERVAL = const(30)
+UPDATE_INTERVAL = _UPDATE_INTERVAL
+
+# Temperature range (in Celsius) covered by the temperature color scale.
+_MIN_TEMP = const(0)
+_MAX_TEMP = const(30)
+
+# Temperature range (in Celsius) covered by the precomputed temperature color table.
+_LUT_MIN_TEMP = const(-20)
+_LUT_MAX_TEMP = const(50)
 
 # Initialize global variables.
 graphics = None
 
+# JPEG decoder, created once and reused for every icon.
+_jpeg = None
+
+# Path and raw bytes of the most recently decoded status icon.
+_icon_cache_path = None
+_icon_cache_data = None
+
+# Set when the fetched weather matches the last drawn weather, so the e-ink refresh can be skipped.
+_skip_draw = False
+
+# Signature of a completely drawn frame, stored in the app state by draw() once it is on the display.
+_drawn_signature = None
+
+# ADC channel 4 is connected to the internal temperature sensor of the RP2040.
+_adc_temp = ADC(4)
+
+# Typically, Vbe = 0.706V at 27 degrees C, with a slope of -1.721mV per degree.
+# This formular can be found in https://datasheets.raspberrypi.com/rp2040/rp2040-datasheet.pdf in section 4.9.5 "Temperature Sensor".
+_TEMP_FACTOR = 3.3 / 65536 / 0.001721
+_TEMP_OFFSET = 27 + 0.706 / 0.001721
+
 def update():
     """
     Main update function to fetch and display weather data.
@@ -68,40 +100,30 @@ def fetch_internal_temperature():
     Returns:
         float: The temperature in Celsius.
     """
-    adc = ADC(4)
-
-    try:
-        # First, we need to read 16 digital bits of data wiht read_u16.
-        # Then, we need to get a reading in the range of 0 to 65535 for a voltage range of 0V to 3.3V.
-        # We then scale into the voltage range between 0V to 3.3V.
-        adc_voltage = adc.read_u16() * (3.3 / 65536)
-
-        # Based on the upper equation, we need to calculate the value for temperature in Celcius.
-        # Typically, Vbe = 0.706V at 27 degrees C, with a slope of -1.721mV per degree.
-        # Therefore the temperature can be approximated as follows: 27 - (adc_voltage - 0.706) / 0.001721
-        # This formular can be found in https://datasheets.raspberrypi.com/rp2040/rp2040-datasheet.pdf in section 4.9.5 "Temperature Sensor".
-        temp = 27 - (adc_voltage - 0.706) / 0.001721
-
-        return temp
-    except Exception as e:
-        print(f"Error fetching temperature data: {e}")
-        return None
+    # First, we need to read 16 digital bits of data wiht read_u16.
+    # Then, we need to get a reading in the range of 0 to 65535 for a voltage range of 0V to 3.3V.
+    # Based on that voltage, the temperature is approximated as follows: 27 - (adc_voltage - 0.706) / 0.001721
+    # Both steps are folded into _TEMP_OFFSET and _TEMP_FACTOR, so only one multiply and one subtract are left.
+    return _TEMP_OFFSET - _adc_temp.read_u16() * _TEMP_FACTOR
 
 def fetch_weather(lat, lon, lang, api_key, unit):
     """
     Fetches current weather data from OpenWeather API.
 
     Returns:
-        tuple: Weather data (name, temp, feels_like, description, icon, humidity).
+        tuple: Weather data (name, temp, feels_like, description, icon, icon_path, humidity).
     """
     try:
         # Fixed weather URL from openweathermap.
         url = f"http://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&lang={lang}&appid={api_key}&units={unit}"
 
-        # Send GET request to the weather API.
+        # Send GET request to the weather API and parse the body straight from the socket.
         response = urequests.get(url)
-        data = response.json()
-        response.close()
+
+        try:
+            data = ujson.load(response.raw)
+        finally:
+            response.close()
 
         # Extract weather data.
         name = data['name']
@@ -109,12 +131,13 @@ def fetch_weather(lat, lon, lang, api_key, unit):
         feels = data['main']['feels_like']
         description = data['weather'][0]['description']
         icon = data['weather'][0]['icon']
+        icon_path = "/status/" + icon + ".jpg"
         humidity = data['main']['humidity']
 
-        return name, temp, feels, description, icon, humidity
+        return name, temp, feels, description, icon, icon_path, humidity
     except Exception as e:
         print(f"Error fetching weather data: {e}")
-        return None, None, None, None, None, None
+        return None, None, None, None, None, None, None
 
 def fetch_forecast(lat, lon, api_key, unit):
     """
@@ -128,14 +151,18 @@ def fetch_forecast(lat, lon, api_key, unit):
         # The amount of data points is therefore limited to 3, this prevents an out of memory message for retriving to much data at a time.
         url = f"http://api.openweathermap.org/data/2.5/forecast?lat={lat}&lon={lon}&cnt=3&appid={api_key}&units={unit}"
 
-        # Send GET request to the forecast API.
+        # Send GET request to the forecast API and parse the body straight from the socket.
         response = urequests.get(url)
-        data = response.json()
-        response.close()
+
+        try:
+            data = ujson.load(response.raw)
+        finally:
+            response.close()
 
         # Extract forecast data.
         forecast_list = data['list']
         forecast_data = []
+        forecast = None
 
         for forecast in forecast_list:
             temp = forecast['main']['temp']
@@ -147,14 +174,14 @@ def fetch_forecast(lat, lon, api_key, unit):
             wind_deg = forecast['wind']['deg']
             dt_txt = forecast['dt_txt']
 
-            date_txt = dt_txt.split(' ')[0]
-            time_txt = dt_txt.split(' ')[1]
+            date_txt, time_txt = dt_txt.split(' ', 1)
 
             # Store the extracted data in a dictionary.
             forecast_data.append({
                 'temp': temp,
                 'description': description,
                 'icon': icon,
+                'icon_path': "/status/" + icon + ".jpg",
                 'humidity': humidity,
                 'wind_speed': wind_speed,
                 'wind_gust': wind_gust,
@@ -163,6 +190,10 @@ def fetch_forecast(lat, lon, api_key, unit):
                 'time': time_txt
             })
 
+        # Drop the parsed response before the JPEG decoder starts allocating.
+        del data, forecast_list, forecast
+        gc.collect()
+
         return forecast_data
     except Exception as e:
         print(f"Error fetching weather forecast data: {e}")
@@ -183,125 +214,241 @@ def interpolate_color(min_temp, max_temp, current_temp, color1, color2):
         tuple: Interpolated RGB color.
     """
     ratio = (current_temp - min_temp) / (max_temp - min_temp)
-    ratio = max(0, min(1, ratio))
+    ratio = 0.0 if ratio < 0.0 else (1.0 if ratio > 1.0 else ratio)
+
+    r1, g1, b1 = color1
+    r2, g2, b2 = color2
 
-    r = int(color1[0] + ratio * (color2[0] - color1[0]))
-    g = int(color1[1] + ratio * (color2[1] - color1[1]))
-    b = int(color1[2] + ratio * (color2[2] - color1[2]))
+    return (int(r1 + ratio * (r2 - r1)), int(g1 + ratio * (g2 - g1)), int(b1 + ratio * (b2 - b1)))
 
-    return (r, g, b)
+def build_temperature_lut():
+    """
+    Builds a lookup table of display colors for every full degree between _LUT_MIN_TEMP and _LUT_MAX_TEMP.
+
+    Returns:
+        bytes: Packed RGB colors, three bytes per degree starting at _LUT_MIN_TEMP.
+    """
+    lut = bytearray(3 * (_LUT_MAX_TEMP - _LUT_MIN_TEMP + 1))
+
+    for i in range(_LUT_MAX_TEMP - _LUT_MIN_TEMP + 1):
+        temp_celsius = _LUT_MIN_TEMP + i
+
+        if(temp_celsius < 18):
+            lut[3 * i:3 * i + 3] = bytes(interpolate_color(_MIN_TEMP, 18, temp_celsius, (120, 160, 255), (255, 160, 0)))
+        else:
+            lut[3 * i:3 * i + 3] = bytes(interpolate_color(20, _MAX_TEMP, temp_celsius, (255, 160, 0), (255, 0, 0)))
+
+    return bytes(lut)
+
+# Precomputed temperature colors, so no floating point math is needed when drawing.
+_TEMP_LUT = build_temperature_lut()
 
 def get_temperature_color(temp_celsius):
     """
     Determines the display color based on the current temperature.
 
+    The temperature is truncated to full degrees and clamped to the range of the lookup table.
+
     Args:
         temp_celsius (float): Temperature in Celsius.
 
     Returns:
         tuple: RGB color corresponding to the temperature.
     """
-    if(temp_celsius < 18):
-        return interpolate_color(0, 18, temp_celsius, (120, 160, 255), (255, 160, 0))
-    else:
-        return interpolate_color(20, 30, temp_celsius, (255, 160, 0), (255, 0, 0))
+    temp_celsius = int(temp_celsius)
+
+    if temp_celsius < _LUT_MIN_TEMP:
+        temp_celsius = _LUT_MIN_TEMP
+    elif temp_celsius > _LUT_MAX_TEMP:
+        temp_celsius = _LUT_MAX_TEMP
+
+    i = 3 * (temp_celsius - _LUT_MIN_TEMP)
+
+    return (_TEMP_LUT[i], _TEMP_LUT[i + 1], _TEMP_LUT[i + 2])
+
+def open_status_icon(icon_path):
+    """
+    Opens a status icon in the JPEG decoder, reading it from flash only if it differs from the last icon.
+
+    Consecutive forecast intervals often share the same icon, so the last icon is kept in RAM
+    and passed to the decoder directly instead of being read from the filesystem again.
+
+    Args:
+        icon_path (str): Path of the status icon JPEG file.
+    """
+    global _icon_cache_path, _icon_cache_data
+
+    if icon_path != _icon_cache_path:
+        # Release the previous icon before reading the next one, the cache stays empty if reading fails.
+        _icon_cache_path = None
+        _icon_cache_data = None
+
+        with open(icon_path, "rb") as f:
+            _icon_cache_data = f.read()
+
+        _icon_cache_path = icon_path
+
+    _jpeg.open_RAM(_icon_cache_data)
+
+def weather_signature(name, temp, feels, description, icon, humidity, forecast):
+    """
+    Builds a signature of the weather data shown on the display.
+
+    The internal room temperature is not part of the signature, it changes slightly on every
+    reading and would otherwise force a full e-ink refresh on every update.
+
+    Args:
+        name (str): Name of the location.
+        temp (float): Current temperature.
+        feels (float): Current perceived temperature.
+        description (str): Description of the current weather.
+        icon (str): Status icon of the current weather.
+        humidity (int): Current humidity.
+        forecast (list): Forecast data as returned by fetch_forecast().
+
+    Returns:
+        str: The displayed weather data joined into one string, compared for equality between updates.
+    """
+    fields = [name, str(temp), str(feels), description, icon, str(humidity)]
+
+    for day in forecast:
+        fields.append(day['date'])
+        fields.append(day['time'])
+        fields.append(str(day['temp']))
+        fields.append(day['icon'])
+
+    return "|".join(fields)
 
 def do_update():
     """
     Fetches and displays weather information on the Inky Frame display.
+
+    If the fetched data matches the data drawn on the last update, nothing is drawn and draw() skips the refresh.
     """
-    name, temp, feels, description, icon, humidity = fetch_weather(LAT, LON, LANG, API_KEY, UNIT)
+    global _jpeg, _icon_cache_path, _icon_cache_data, _skip_draw, _drawn_signature
+
+    _skip_draw = False
+    _drawn_signature = None
+
+    # Bind frequently used globals to locals once, local lookups are cheaper in MicroPython.
+    g = graphics
+    width = WIDTH
+    height = HEIGHT
+
+    # Create the JPEG decoder for our PicoGraphics only once.
+    if _jpeg is None:
+        _jpeg = jpegdec.JPEG(g)
+
+    name, temp, feels, description, icon, icon_path, humidity = fetch_weather(LAT, LON, LANG, API_KEY, UNIT)
 
     if temp is None:
         print("Failed to retrieve weather data.")
         return
 
-    int_temp_c = fetch_internal_temperature()
+    # Fetch the forecast for the next three days.
+    forecast = fetch_forecast(LAT, LON, API_KEY, UNIT)
 
-    # Make sure to clean up memory before proceeding.
-    gc.collect()
+    # Skip drawing if the weather did not change since the last update.
+    signature = weather_signature(name, temp, feels, description, icon, humidity, forecast)
+
+    if signature == sh.state.get('weather_sig'):
+        print("Weather unchanged, skipping redraw.")
+        _skip_draw = True
+        return
+
+    int_temp_c = fetch_internal_temperature()
 
     # Set pen to white.
-    graphics.set_pen(1)
+    g.set_pen(1)
 
     # Clear the display.
-    graphics.clear()
+    g.clear()
 
     # Display icon for weather status.
     try:
         # Open and display status symbol.
-        jpeg = jpegdec.JPEG(graphics)
-
-        jpeg.open_file("/status/" + icon + ".jpg")
-        jpeg.decode(WIDTH - 240, 0, jpegdec.JPEG_SCALE_FULL, dither=True)
+        open_status_icon(icon_path)
+        _jpeg.decode(width - 240, 0, jpegdec.JPEG_SCALE_FULL, dither=True)
     except OSError:
         print("Failed to retrieve status icon.")
 
-    # Make sure to clean up memory before proceeding.
-    gc.collect()
-
     # Set pen to black.
-    graphics.set_pen(0)
+    g.set_pen(0)
 
     # Choose a font.
-    graphics.set_font("bitmap8")
+    g.set_font("bitmap8")
 
     # Display the weather information.
-    graphics.text(f"{LOCATION_NAME}, Heute", 30, 30, scale=4)
-    graphics.text(f"Fühlt sich an wie {feels}", 30, 160)
-    graphics.text(f"{description}", 30, 180)
-    graphics.text(f"Die Luftfeuchtigkeit liegt bei {humidity}%", 30, 200)
+    g.text(f"{LOCATION_NAME}, Heute", 30, 30, scale=4)
+    g.text(f"Fühlt sich an wie {feels}", 30, 160)
+    g.text(f"{description}", 30, 180)
+    g.text(f"Die Luftfeuchtigkeit liegt bei {humidity}%", 30, 200)
 
-    if int_temp_c is not None:
-        graphics.text(f"Raumtemparatur: {int_temp_c:.2f} C", 30, 220)
-
-    # Get some memory back, we really need it!
-    gc.collect()
+    g.text(f"Raumtemparatur: {int_temp_c:.2f} C", 30, 220)
 
     # Print out the temperature.
     color = get_temperature_color(temp)
 
-    graphics.set_pen(graphics.create_pen(color[0], color[1], color[2]))
+    g.set_pen(g.create_pen(color[0], color[1], color[2]))
 
-    graphics.text(f"{temp}°C", 30, 80, scale=8)
+    g.text(f"{temp}°C", 30, 80, scale=8)
 
     # Set pen back to black.
-    graphics.set_pen(0)
-
-    # Get some memory back, we really need it!
-    gc.collect()
+    g.set_pen(0)
 
     # Print out forecast for the next three days.
-    forecast = fetch_forecast(LAT, LON, API_KEY, UNIT)
     day_number = 0
 
+    # Row positions of the forecast block are the same for every day.
+    date_y = height - 180
+    time_y = height - 160
+    icon_y = height - 140
+    temp_y = height - 30
+
+    # The forecast lines are not stacked (different x offsets, icon in between), so they can't be
+    # drawn as one multi-line string. Bind the method once instead of looking it up per line.
+    text = g.text
+
     for day in forecast:
-        graphics.text(f"{day['date']}", 50 + (200 * day_number), HEIGHT - 180, scale=2)
-        graphics.text(f"{day['time']}", 60 + (200 * day_number), HEIGHT - 160, scale=2)
-        graphics.text(f"{day['temp']}°C", 70 + (200 * day_number), HEIGHT - 30, scale=2)
+        x = 200 * day_number
+
+        text(day['date'], 50 + x, date_y, scale=2)
+        text(day['time'], 60 + x, time_y, scale=2)
+        text(str(day['temp']) + "°C", 70 + x, temp_y, scale=2)
 
         # Print out the status icon.
         try:
             # Open and display status symbol.
-            if jpeg is None:
-                jpeg = jpegdec.JPEG(graphics)
-
-            jpeg.open_file("/status/" + day['icon'] + ".jpg")
-            jpeg.decode(40 + (200 * day_number), HEIGHT - 140, jpegdec.JPEG_SCALE_HALF, dither=True)
+            open_status_icon(day['icon_path'])
+            _jpeg.decode(40 + x, icon_y, jpegdec.JPEG_SCALE_HALF, dither=True)
 
             day_number = day_number + 1
         except OSError:
             print("Failed to retrieve status icon.")
 
-        # Make sure to clean up memory before proceeding.
-        gc.collect()
+    # Drop the cached icon and get some memory back once all icons are decoded.
+    _icon_cache_path = None
+    _icon_cache_data = None
+
+    gc.collect()
+
+    # The frame is complete, draw() records its signature after the display refresh.
+    _drawn_signature = signature
 
 def draw():
     """
-    Displays the final graphics on the Inky Frame display.
+    Displays the final graphics on the Inky Frame display, unless the weather did not change.
     """
-    if graphics is not None:
+    global _drawn_signature
+
+    if graphics is not None and not _skip_draw:
         graphics.update()
 
+        # Only remember the signature of frames that were drawn completely.
+        if _drawn_signature is not None:
+            sh.state['weather_sig'] = _drawn_signature
+            sh.save_state(sh.state)
+            _drawn_signature = None
+
     # Set next update interval.
-    UPDATE_INTERVAL = sh.get_app_update_interval(30, 120)
+    UPDATE_INTERVAL = sh.get_app_update_interval(_UPDATE_INTERVAL, 120)
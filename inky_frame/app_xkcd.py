@@ -8,46 +8,55 @@ import gc
 import uos
 import machine
 import jpegdec
-import uasyncio
-import sdcard
+import usocket
+import binascii
 import inky_frame
+import sd_mount
+import app_state as sh
 
-from machine import Pin, SPI
-from urllib import urequest
+from micropython import const
 
 # The default update interval for this app in minutes.
 UPDATE_INTERVAL = 480
 
 # Constants for cache file and endpoint.
 FILENAME = "/sd/xkcd-daily.jpg"
-ENDPOINT = "https://raw.githubusercontent.com/73s3m1/pi-pico-micropython-e-ink/49cd304de0ef0ac50105d273ebb9779f1e7b0ff2/image/xkcd/xkcd-daily.jpg"
+META_FILENAME = "/sd/xkcd-daily.meta"
+
+# The endpoint can be overridden with XKCD_ENDPOINT in config.py.
+try:
+    from config import XKCD_ENDPOINT as ENDPOINT
+except ImportError:
+    ENDPOINT = "https://raw.githubusercontent.com/73s3m1/pi-pico-micropython-e-ink/49cd304de0ef0ac50105d273ebb9779f1e7b0ff2/image/xkcd/xkcd-daily.jpg"
 
 print("Load app for daily XKCD message.")
 
+# Constants for screen width and height, set by main.py.
+WIDTH = None
+HEIGHT = None
+
 # Initialize objects.
 graphics = None
 
-# Free some memory.
-gc.collect()
+# Largest image (in bytes) that is downloaded into RAM and decoded from there.
+# Larger images, or responses without a Content-Length, are streamed to the SD card instead.
+_MAX_RAM_IMAGE = const(32768)
 
-print("Start mounting SD card.")
+# Size of the buffer used to stream images to the SD card. It is a multiple of the 512 byte
+# SD card sector size, so each write covers whole sectors.
+_SD_CHUNK = const(4096)
 
-# Set up the SD card.
-sd_spi = SPI(0, sck=Pin(18, Pin.OUT), mosi=Pin(19, Pin.OUT), miso=Pin(16, Pin.OUT))
-sd = sdcard.SDCard(sd_spi, Pin(22))
+# Image data, validators and CRC32 of a downloaded image that is still waiting to be cached on the SD card.
+_pending_buf = None
+_pending_etag = None
+_pending_last_modified = None
+_pending_crc = None
 
-# Try to mount the SD card.
-try:
-    uos.mount(sd, "/sd")
-    
-    print("Finished mounting SD card.")
-except Exception as e:
-    print(f"Error mounting SD card: {e}")
-    
-    sd = None
+# Set when the image is the same as the one already on the display, so the e-ink refresh can be skipped.
+_skip_draw = False
 
-# Free some memory.
-gc.collect()
+# CRC32 of a completely decoded image, stored in the app state by draw() once it is on the display.
+_drawn_crc = None
 
 def update():
     """
@@ -60,8 +69,8 @@ def update():
     Returns:
     - None
     """
-    # Check if SD card is mounted, if not, skip the update.
-    if sd is None:
+    # Mount the SD card on first use, if it is not available, skip the update.
+    if sd_mount.get_sd() is None:
         print("SD card not mounted.")
         return
     
@@ -79,6 +88,111 @@ def update():
         # Ensure the busy LED is turned off even if there's an error.
         inky_frame.led_busy.off()
 
+def read_meta():
+    """
+    Read the cache validators (ETag and Last-Modified) and the CRC32 of the cached image from the SD card.
+    
+    Parameters:
+    - None
+
+    Returns:
+    - tuple: (etag, last_modified, crc), each None if unknown or if there is no cached image.
+    """
+    try:
+        # Validators are useless without the cached image they belong to.
+        uos.stat(FILENAME)
+        
+        with open(META_FILENAME, "r") as f:
+            etag = f.readline().strip()
+            last_modified = f.readline().strip()
+            crc = f.readline().strip()
+        
+        return etag or None, last_modified or None, int(crc) if crc else None
+    except (OSError, ValueError):
+        return None, None, None
+
+def write_meta(etag, last_modified, crc):
+    """
+    Save the cache validators (ETag and Last-Modified) and the CRC32 of the cached image to the SD card.
+    
+    Parameters:
+    - etag (str): The ETag response header, or None.
+    - last_modified (str): The Last-Modified response header, or None.
+    - crc (int): The CRC32 of the cached image.
+
+    Returns:
+    - None
+    """
+    with open(META_FILENAME, "w") as f:
+        f.write((etag or "") + "\n" + (last_modified or "") + "\n" + str(crc) + "\n")
+
+def open_url(url, etag=None, last_modified=None):
+    """
+    Open an HTTP(S) GET request like urequest.urlopen, but send conditional request headers
+    and return the response status and cache validators along with the socket.
+    
+    Parameters:
+    - url (str): The URL to request.
+    - etag (str): ETag of the cached copy, sent as If-None-Match, or None.
+    - last_modified (str): Last-Modified date of the cached copy, sent as If-Modified-Since, or None.
+
+    Returns:
+    - tuple: (status, etag, last_modified, content_length, socket), the socket is positioned at the start
+      of the body. content_length is None if the server did not send it.
+    """
+    proto, _, host, path = url.split("/", 3)
+    port = 443 if proto == "https:" else 80
+    
+    if ":" in host:
+        host, port = host.split(":", 1)
+        port = int(port)
+    
+    ai = usocket.getaddrinfo(host, port, 0, usocket.SOCK_STREAM)[0]
+    s = usocket.socket(ai[0], ai[1], ai[2])
+    
+    try:
+        s.connect(ai[-1])
+        
+        if proto == "https:":
+            import ussl
+            s = ussl.wrap_socket(s, server_hostname=host)
+        
+        s.write(b"GET /" + path.encode() + b" HTTP/1.0\r\nHost: " + host.encode() + b"\r\n")
+        
+        if etag:
+            s.write(b"If-None-Match: " + etag.encode() + b"\r\n")
+        if last_modified:
+            s.write(b"If-Modified-Since: " + last_modified.encode() + b"\r\n")
+        
+        s.write(b"\r\n")
+        
+        status = int(s.readline().split(None, 2)[1])
+        etag = None
+        last_modified = None
+        content_length = None
+        
+        # Read the response headers and keep only the cache validators.
+        while True:
+            line = s.readline()
+            
+            if not line or line == b"\r\n":
+                break
+            
+            name, _, value = line.decode().partition(":")
+            name = name.lower()
+            
+            if name == "etag":
+                etag = value.strip()
+            elif name == "last-modified":
+                last_modified = value.strip()
+            elif name == "content-length":
+                content_length = int(value)
+    except OSError:
+        s.close()
+        raise
+    
+    return status, etag, last_modified, content_length, s
+
 def do_update():
     """
     Perform the actual update process by downloading the image and saving it to the SD card.
@@ -90,32 +204,109 @@ def do_update():
     Returns:
     - None
     """
-    global graphics
+    global graphics, _pending_buf, _pending_etag, _pending_last_modified, _pending_crc, _skip_draw, _drawn_crc
     
-    # Get the display bounds from the inky display.
-    WIDTH, HEIGHT = graphics.get_bounds()
+    _skip_draw = False
+    _drawn_crc = None
     
-    # Free up memory before displaying the message.
+    # Free up memory before the TLS connection and the JPEG decoder allocate their buffers.
     gc.collect()
     
-    # Use the default endpoint URL to retrieve the image.
-    url = ENDPOINT
+    # Open a socket, asking the server to only send the image if it changed since the cached copy.
+    etag, last_modified, crc = read_meta()
+    status, new_etag, new_last_modified, length, socket = open_url(ENDPOINT, etag, last_modified)
     
-    # Open a socket and stream the image data.
-    socket = urequest.urlopen(url)
+    # Image data held in RAM, None if the image has to be decoded from the SD card.
+    buf = None
     
-    # Create a buffer to store chunks of image data while streaming.
-    data = bytearray(1024)
+    if status == 304:
+        # The cached image is still up to date, skip the download.
+        socket.close()
+        
+        print("XKCD image not modified, using cached image.")
+    elif status == 200:
+        # Drop the old validators first, so an interrupted download is never treated as up to date.
+        try:
+            uos.remove(META_FILENAME)
+        except OSError:
+            pass
+        
+        if length is not None and length <= _MAX_RAM_IMAGE:
+            # The image fits into RAM, download it into a buffer of exactly its size.
+            buf = bytearray(length)
+            mv = memoryview(buf)
+            size = 0
+            
+            while size < length:
+                n = socket.readinto(mv[size:size + 1024])
+                
+                if n == 0:
+                    socket.close()
+                    
+                    raise OSError("Connection closed before the image was fully downloaded")
+                
+                size += n
+            
+            crc = binascii.crc32(buf)
+            
+            # Cache the image on the SD card after the display refresh (see draw()).
+            _pending_buf = buf
+            _pending_etag = new_etag
+            _pending_last_modified = new_last_modified
+            _pending_crc = crc
+        else:
+            # Stream the image to the SD card and decode it from there.
+            data = memoryview(bytearray(_SD_CHUNK))
+            off = 0
+            crc = 0
+            
+            with open(FILENAME, "wb") as f:
+                # Collect socket reads until the buffer is full and write it in one go.
+                while True:
+                    n = socket.readinto(data[off:off + 1024])
+                    
+                    if n == 0:
+                        break
+                    
+                    off += n
+                    
+                    if off == _SD_CHUNK:
+                        crc = binascii.crc32(data, crc)
+                        f.write(data)
+                        off = 0
+                
+                # Only write the bytes actually read, the last chunk is usually shorter than the buffer.
+                if off:
+                    crc = binascii.crc32(data[:off], crc)
+                    f.write(data[:off])
+            
+            data = None
+            
+            # Remember the validators of the new image for the next update.
+            write_meta(new_etag, new_last_modified, crc)
+        
+        # Close the socket after the image is fully downloaded.
+        socket.close()
+    else:
+        socket.close()
+        
+        raise OSError(f"Unexpected HTTP status {status}")
     
-    # Save the streamed image data to a file on the SD card.
-    with open(FILENAME, "wb") as f:
-        while True:
-            if socket.readinto(data) == 0:
-                break
-            f.write(data)
-    
-    # Close the socket after the image is fully downloaded.
-    socket.close()
+    # Skip decoding and refreshing if the display already shows this image.
+    if crc is not None and crc == sh.state.get('xkcd_crc'):
+        print("XKCD image unchanged, skipping redraw.")
+        _skip_draw = True
+        
+        # The SD card already holds this image, only store the new validators.
+        if _pending_buf is not None:
+            write_meta(_pending_etag, _pending_last_modified, _pending_crc)
+            
+            _pending_buf = None
+            _pending_etag = None
+            _pending_last_modified = None
+            _pending_crc = None
+        
+        return
     
     # Initialize the JPEG decoder with the graphics object.
     jpeg = jpegdec.JPEG(graphics)
@@ -124,14 +315,45 @@ def do_update():
     graphics.set_pen(1)
     graphics.clear()
 
-    # Open the saved JPEG file and decode it onto the display.
-    jpeg.open_file(FILENAME)
+    # Open the downloaded image from RAM, or the cached image from the SD card, and decode it onto the display.
+    if buf is not None:
+        jpeg.open_RAM(buf)
+    else:
+        jpeg.open_file(FILENAME)
+    
     jpeg.decode()
+    
+    # The image is decoded completely, draw() records its CRC after the display refresh.
+    _drawn_crc = crc
+
+def save_pending_image():
+    """
+    Save an image that was decoded from RAM to the SD card, together with its cache validators.
+    
+    Parameters:
+    - None
+
+    Returns:
+    - None
+    """
+    global _pending_buf, _pending_etag, _pending_last_modified, _pending_crc
+    
+    if _pending_buf is None:
+        return
+    
+    with open(FILENAME, "wb") as f:
+        f.write(_pending_buf)
+    
+    write_meta(_pending_etag, _pending_last_modified, _pending_crc)
+    
+    _pending_buf = None
+    _pending_etag = None
+    _pending_last_modified = None
+    _pending_crc = None
 
 def draw():
     """
     Render the current graphics buffer to the screen.
-    Ensures memory is managed effectively before and after the drawing operation.
     
     Parameters:
     - None
@@ -139,11 +361,19 @@ def draw():
     Returns:
     - None
     """
+    global _drawn_crc
+    
     print("Draw graphics updates to screen.")
     
-    # Free up some more memory before updating the display.
-    gc.collect()
+    # Display the result if graphics object is initialized and the image changed.
+    if graphics is not None and not _skip_draw:
+        graphics.update()
+        
+        # Only remember the CRC of images that were drawn completely.
+        if _drawn_crc is not None:
+            sh.state['xkcd_crc'] = _drawn_crc
+            sh.save_state(sh.state)
+            _drawn_crc = None
     
-    # Display the result if graphics object is initialized.
-    if graphics is not None:
-        graphics.update()
\ No newline at end of file
+    # Cache a freshly downloaded image on the SD card only after the display was refreshed.
+    save_pending_image()
\ No newline at end of file
@@ -14,4 +14,6 @@ LON=7.45
 # Language for the weather API.
 LANG="de"
 # Unit used for temperature, quanitities or time.
-UNIT="metric"
\ No newline at end of file
+UNIT="metric"
+# Optional image URL for the XKCD app (a JPEG matching the display size).
+# XKCD_ENDPOINT="https://pimoroni.github.io/feed2image/xkcd-daily.jpg"
\ No newline at end of file
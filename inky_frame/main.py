@@ -13,20 +13,21 @@ import network_util as ih
 import inky_frame
 import app_state as sh
 
+from micropython import const
 from machine import reset
 
 # For importing PicoGraphics we need to specify the size of the Inky Frame (in this case 5.7").
 from picographics import PicoGraphics, DISPLAY_INKY_FRAME as DISPLAY
 
 # Define all available colors for the e-ink screen.
-BLACK = 0
-WHITE = 1
-GREEN = 2
-BLUE = 3
-RED = 4
-YELLOW = 5
-ORANGE = 6
-TAUPE = 7
+_BLACK = const(0)
+_WHITE = const(1)
+_GREEN = const(2)
+_BLUE = const(3)
+_RED = const(4)
+_YELLOW = const(5)
+_ORANGE = const(6)
+_TAUPE = const(7)
 
 # Next we need a short delay to give USB a chance to initialise.
 time.sleep(0.5)
@@ -37,6 +38,44 @@ graphics = PicoGraphics(DISPLAY)
 # Retrive width and height bounds from display for later use.
 WIDTH, HEIGHT = graphics.get_bounds()
 
+# Pen for the highlight boxes of the launcher menu, created once.
+HIGHLIGHT_PEN = graphics.create_pen(220, 220, 220)
+
+# Layout of the launcher menu, computed once as the display size never changes.
+LAUNCHER_Y_OFFSET = 20
+
+LAUNCHER_OPTIONS = (
+    ("A. Nasa Picture", 30, HEIGHT - (340 + LAUNCHER_Y_OFFSET), WIDTH - 100, 50, 3),
+    ("B. Pictures", 30, HEIGHT - (280 + LAUNCHER_Y_OFFSET), WIDTH - 150, 50, 3),
+    ("C. Weather", 30, HEIGHT - (220 + LAUNCHER_Y_OFFSET), WIDTH - 200, 50, 3),
+    ("D. Headlines", 30, HEIGHT - (160 + LAUNCHER_Y_OFFSET), WIDTH - 250, 50, 3),
+    ("E. XKCD", 30, HEIGHT - (100 + LAUNCHER_Y_OFFSET), WIDTH - 300, 50, 3),
+)
+
+LAUNCHER_HIGHLIGHTS = (
+    (WIDTH - 100, HEIGHT - (340 + LAUNCHER_Y_OFFSET), 70, 50),
+    (WIDTH - 150, HEIGHT - (280 + LAUNCHER_Y_OFFSET), 120, 50),
+    (WIDTH - 200, HEIGHT - (220 + LAUNCHER_Y_OFFSET), 170, 50),
+    (WIDTH - 250, HEIGHT - (160 + LAUNCHER_Y_OFFSET), 220, 50),
+    (WIDTH - 300, HEIGHT - (100 + LAUNCHER_Y_OFFSET), 270, 50),
+)
+
+# Title and note of the launcher menu, with half their text width for centering.
+LAUNCHER_TITLE = "Launcher"
+LAUNCHER_TITLE_LEN = graphics.measure_text(LAUNCHER_TITLE, 4) // 2
+
+LAUNCHER_NOTE = "Hold A + E, then press Reset, to return to the Launcher"
+LAUNCHER_NOTE_LEN = graphics.measure_text(LAUNCHER_NOTE, 2) // 2
+
+# Apps launched by the buttons of the launcher menu.
+APP_STATES = {
+    'A': "app_nasa",
+    'B': "app_pictures",
+    'C': "app_weather",
+    'D': "app_news",
+    'E': "app_xkcd"
+}
+
 # Turn any LEDs off that may still be on from last run.
 ih.clear_button_leds()
 ih.led_warn.off()
@@ -58,9 +97,9 @@ def draw_option(text, x, y, width, height, text_size):
     """
     global graphics
     
-    graphics.set_pen(ORANGE)
+    graphics.set_pen(_ORANGE)
     graphics.rectangle(x, y, width, height)
-    graphics.set_pen(WHITE)
+    graphics.set_pen(_WHITE)
     graphics.text(text, x + 5, y + 15, width, text_size)
 
 def draw_highlight(x, y, width, height):
@@ -78,7 +117,7 @@ def draw_highlight(x, y, width, height):
     """
     global graphics
     
-    graphics.set_pen(graphics.create_pen(220, 220, 220))
+    graphics.set_pen(HIGHLIGHT_PEN)
     graphics.rectangle(x, y, width, height)
 
 def draw_launcher_menu():
@@ -93,69 +132,38 @@ def draw_launcher_menu():
     """
     global graphics
     
-    y_offset = 20
-    
-    graphics.set_pen(WHITE)
+    graphics.set_pen(_WHITE)
     graphics.clear()
-    graphics.set_pen(ORANGE)
+    graphics.set_pen(_ORANGE)
     graphics.rectangle(0, 0, WIDTH, 50)
-    graphics.set_pen(WHITE)
-    
-    title = "Launcher"
-    title_len = graphics.measure_text(title, 4) // 2
-    graphics.text(title, (WIDTH // 2 - title_len), 10, WIDTH, 4)
+    graphics.set_pen(_WHITE)
     
-    options = [
-        ("A. Nasa Picture", 30, HEIGHT - (340 + y_offset), WIDTH - 100, 50, 3),
-        ("B. Pictures", 30, HEIGHT - (280 + y_offset), WIDTH - 150, 50, 3),
-        ("C. Weather", 30, HEIGHT - (220 + y_offset), WIDTH - 200, 50, 3),
-        ("D. Headlines", 30, HEIGHT - (160 + y_offset), WIDTH - 250, 50, 3),
-        ("E. XKCD", 30, HEIGHT - (100 + y_offset), WIDTH - 300, 50, 3),
-    ]
+    graphics.text(LAUNCHER_TITLE, (WIDTH // 2 - LAUNCHER_TITLE_LEN), 10, WIDTH, 4)
     
-    for option in options:
+    for option in LAUNCHER_OPTIONS:
         draw_option(*option)
     
-    highlights = [
-        (WIDTH - 100, HEIGHT - (340 + y_offset), 70, 50),
-        (WIDTH - 150, HEIGHT - (280 + y_offset), 120, 50),
-        (WIDTH - 200, HEIGHT - (220 + y_offset), 170, 50),
-        (WIDTH - 250, HEIGHT - (160 + y_offset), 220, 50),
-        (WIDTH - 300, HEIGHT - (100 + y_offset), 270, 50),
-    ]
-    
-    for highlight in highlights:
+    for highlight in LAUNCHER_HIGHLIGHTS:
         draw_highlight(*highlight)
     
-    graphics.set_pen(BLACK)
-    note = "Hold A + E, then press Reset, to return to the Launcher"
-    note_len = graphics.measure_text(note, 2) // 2
-    graphics.text(note, (WIDTH // 2 - note_len), HEIGHT - 30, 600, 2)
+    graphics.set_pen(_BLACK)
+    graphics.text(LAUNCHER_NOTE, (WIDTH // 2 - LAUNCHER_NOTE_LEN), HEIGHT - 30, 600, 2)
 
 def handle_button_press(button, state_key):
     """
     Handles a button press event, triggering the appropriate app to launch.
 
     Parameters:
-    - button (object): The button object that is being checked for a press.
+    - button (object): The button object that has been pressed.
     - state_key (str): The key corresponding to the app state in APP_STATES dictionary.
 
     Returns:
     - None
     """
-    app_states = {
-        'A': "app_nasa",
-        'B': "app_pictures",
-        'C': "app_weather",
-        'D': "app_news",
-        'E': "app_xkcd"
-    }
-    
-    if button.read():
-        button.led_on()
-        sh.update_state(app_states[state_key])
-        time.sleep(0.5)
-        reset()
+    button.led_on()
+    sh.update_state(APP_STATES[state_key])
+    time.sleep(0.5)
+    reset()
 
 def initalize(graphics, width, height):
     """
@@ -172,13 +180,13 @@ def initalize(graphics, width, height):
     graphics.set_font("bitmap8")
     
     # Start initializing the display, by showing a temporary message first.
-    graphics.set_pen(WHITE)
+    graphics.set_pen(_WHITE)
     graphics.clear()
-    graphics.set_pen(BLACK)
+    graphics.set_pen(_BLACK)
     graphics.text("Initializing...", 180, 200, 600, 4)
     
     # Display a short waiting message.
-    graphics.set_pen(BLACK)
+    graphics.set_pen(_BLACK)
     note = "Please wait while the display is loading up the Launcher..."
     note_len = graphics.measure_text(note, 2) // 2
     graphics.text(note, (width // 2 - note_len), height - 30, 600, 2)
@@ -200,12 +208,21 @@ def launcher():
     graphics.update()
     ih.led_warn.off()
     
+    buttons = (
+        (ih.inky_frame.button_a, 'A'),
+        (ih.inky_frame.button_b, 'B'),
+        (ih.inky_frame.button_c, 'C'),
+        (ih.inky_frame.button_d, 'D'),
+        (ih.inky_frame.button_e, 'E'),
+    )
+    
     while True:
-        handle_button_press(ih.inky_frame.button_a, 'A')
-        handle_button_press(ih.inky_frame.button_b, 'B')
-        handle_button_press(ih.inky_frame.button_c, 'C')
-        handle_button_press(ih.inky_frame.button_d, 'D')
-        handle_button_press(ih.inky_frame.button_e, 'E')
+        for button, state_key in buttons:
+            if button.read():
+                handle_button_press(button, state_key)
+        
+        # Poll the buttons every 20 ms instead of spinning at full speed.
+        time.sleep_ms(20)
 
 # If both button A and button E are pressed while reset load init and the launcher.
 if ih.inky_frame.button_a.read() and ih.inky_frame.button_e.read():
@@ -215,7 +232,9 @@ if ih.inky_frame.button_a.read() and ih.inky_frame.button_e.read():
 ih.clear_button_leds()
 
 # Check if json state file exists.
-if ih.file_exists("state.json"):
+has_state = ih.file_exists("state.json")
+
+if has_state:
     # Loads the JSON and launches the app.
     sh.load_state()
     sh.launch_app(sh.state['run'])
@@ -237,9 +256,6 @@ except ImportError:
 # Collect some memory back.
 gc.collect()
 
-# Get the selected state from state.json file.
-file = ih.file_exists("state.json")
-
 # This main loop executes the update and draw function from the imported app.
 while True:
     sh.app.update()
@@ -12,7 +12,7 @@
         - network_led_callback(t): Timer callback to update the network LED brightness in a pulsing pattern.
         - pulse_network_led(speed_hz): Sets the network LED into pulsing mode at the specified speed.
         - stop_network_led(): Turns off the network LED and stops any pulsing animation.
-        - sleep(t): Puts the device to sleep for a specified number of minutes using the RTC.
+        - sleep(t): Puts the device to sleep for a specified number of minutes using the RTC or light sleep.
         - clear_button_leds(): Turns off all the button LEDs on the Inky Frame.
         - network_connect(SSID, PSK): Connects to a Wi-Fi network using the provided SSID and password.
         - file_exists(filename): Checks if a file exists and is a regular file (not a directory).
@@ -20,25 +20,33 @@
 
 import math
 import time
+import array
 import json
 import os
 import network
 import inky_frame
 
+from micropython import const
 from pimoroni_i2c import PimoroniI2C
 from pcf85063a import PCF85063A
-from machine import Pin, PWM, Timer
+from machine import Pin, PWM, Timer, lightsleep, reset
 
 # Pin setup for VSYS_HOLD needed to sleep and wake.
-HOLD_VSYS_EN_PIN = 2
-hold_vsys_en_pin = Pin(HOLD_VSYS_EN_PIN, Pin.OUT)
+_HOLD_VSYS_EN_PIN = const(2)
+hold_vsys_en_pin = Pin(_HOLD_VSYS_EN_PIN, Pin.OUT)
 
 # Initialize the PCF85063A real-time clock (RTC) chip with I2C communication
-I2C_SDA_PIN = 4  # Pin for I2C data (SDA)
-I2C_SCL_PIN = 5  # Pin for I2C clock (SCL)
-i2c = PimoroniI2C(I2C_SDA_PIN, I2C_SCL_PIN, 100000)  # Initialize I2C interface
+_I2C_SDA_PIN = const(4)  # Pin for I2C data (SDA)
+_I2C_SCL_PIN = const(5)  # Pin for I2C clock (SCL)
+i2c = PimoroniI2C(_I2C_SDA_PIN, _I2C_SCL_PIN, 100000)  # Initialize I2C interface
 rtc = PCF85063A(i2c)  # Initialize RTC with I2C interface
 
+# Longest single light sleep in milliseconds, the rp2 sleep timer overflows after about 71 minutes.
+_MAX_SLEEP_MS = const(60 * 60 * 1000)
+
+# File type bit of a regular file in the mode returned by os.stat().
+_S_IFREG = const(0x8000)
+
 # Set up a warning LED on pin 6
 led_warn = Pin(6, Pin.OUT)
 
@@ -47,19 +55,25 @@ network_led_pwm = PWM(Pin(7))
 network_led_pwm.freq(1000)  # Set PWM frequency to 1000 Hz
 network_led_pwm.duty_u16(0)  # Initialize with 0 brightness
 
+# Gamma-corrected duty cycles for every brightness level from 0 to 100.
+_BRIGHT_LUT = array.array('H', [int(pow(b / 100.0, 2.8) * 65535.0 + 0.5) for b in range(101)])
+
 def network_led(brightness):
     """
     Set the brightness of the network LED with gamma correction.
     
     :param brightness: Brightness level (0-100).
     """
-    brightness = max(0, min(100, brightness))  # Clamp brightness to range 0-100
-    value = int(pow(brightness / 100.0, 2.8) * 65535.0 + 0.5)  # Apply gamma correction
-    network_led_pwm.duty_u16(value)  # Set PWM duty cycle
+    brightness = max(0, min(100, int(brightness)))  # Clamp brightness to range 0-100
+    network_led_pwm.duty_u16(_BRIGHT_LUT[brightness])  # Set gamma-corrected PWM duty cycle
 
 # Initialize variables for network LED pulsing
 network_led_timer = Timer(-1)
 network_led_pulse_speed_hz = 1
+network_led_pulse_period_ms = 1000
+
+# Gamma-corrected duty cycles for one period of the sinusoidal pulse, sampled at 256 points.
+_LED_LUT = array.array('H', [int(pow(((math.sin(2 * math.pi * i / 256) * 40) + 60) / 100.0, 2.8) * 65535.0 + 0.5) for i in range(256)])
 
 def network_led_callback(t):
     """
@@ -67,9 +81,8 @@ def network_led_callback(t):
     
     :param t: Timer object.
     """
-    brightness = (math.sin(time.ticks_ms() * math.pi * 2 / (1000 / network_led_pulse_speed_hz)) * 40) + 60
-    value = int(pow(brightness / 100.0, 2.8) * 65535.0 + 0.5)
-    network_led_pwm.duty_u16(value)
+    index = (time.ticks_ms() % network_led_pulse_period_ms) * 256 // network_led_pulse_period_ms
+    network_led_pwm.duty_u16(_LED_LUT[index])
 
 def pulse_network_led(speed_hz=1):
     """
@@ -77,8 +90,9 @@ def pulse_network_led(speed_hz=1):
     
     :param speed_hz: Speed of the pulsing in Hz (default is 1 Hz).
     """
-    global network_led_timer, network_led_pulse_speed_hz
+    global network_led_timer, network_led_pulse_speed_hz, network_led_pulse_period_ms
     network_led_pulse_speed_hz = speed_hz  # Set the pulsing speed
+    network_led_pulse_period_ms = max(1, int(1000 / speed_hz))  # Length of one pulse in milliseconds
     network_led_timer.deinit()  # Deinitialize the previous timer
     network_led_timer.init(period=50, mode=Timer.PERIODIC, callback=network_led_callback)  # Initialize timer
 
@@ -94,6 +108,11 @@ def sleep(t):
     """
     Puts the device to sleep for a specified number of minutes.
     
+    On battery power, releasing HOLD VSYS powers the board down until the RTC timer wakes it up again.
+    On USB power the board stays powered, so Wi-Fi is turned off and the RP2040 light sleeps in chunks
+    of at most 60 minutes until the full time has passed, then resets. In both cases the device wakes
+    up with a reset and main.py runs again from the start, so nothing in RAM survives between two updates.
+    
     :param t: Time to sleep in minutes.
     """
     rtc.clear_timer_flag()  # Clear any existing RTC timer flags
@@ -102,11 +121,31 @@ def sleep(t):
 
     hold_vsys_en_pin.init(Pin.IN)  # Set HOLD VSYS pin to input (allow sleep mode)
 
-    time.sleep(60 * t)  # Sleep for the specified time (in seconds)
+    # Still powered over USB, turn off Wi-Fi, pending CYW43 events would end every light sleep right away.
+    wlan = network.WLAN(network.STA_IF)
+    wlan.disconnect()
+    wlan.active(False)
+
+    # Split the sleep into chunks the rp2 sleep timer can handle. Any interrupt can end a light sleep
+    # early, so the remaining time is always measured against the deadline.
+    deadline = time.ticks_add(time.ticks_ms(), 60 * t * 1000)
+
+    while True:
+        remaining_ms = time.ticks_diff(deadline, time.ticks_ms())
+
+        if remaining_ms <= 0:
+            break
+
+        lightsleep(min(remaining_ms, _MAX_SLEEP_MS))
+
+    reset()  # Start over from main.py, like a wake up by the RTC on battery power
 
 def clear_button_leds():
     """
     Turns off the LEDs of all buttons on the Inky Frame.
+    
+    Only the buttons are read through the shift register. Each button LED is driven by its own
+    PWM pin, so there is no shared register to clear all of them with a single write.
     """
     inky_frame.button_a.led_off()
     inky_frame.button_b.led_off()
@@ -124,17 +163,17 @@ def network_connect(SSID, PSK):
     wlan = network.WLAN(network.STA_IF)  # Create a WLAN interface instance
     wlan.active(True)  # Activate the WLAN interface
 
-    max_wait = 10  # Maximum wait time for connection (in seconds)
+    max_wait = 100  # Maximum number of status checks, 100 ms apart (10 seconds in total)
 
     pulse_network_led()  # Start pulsing the network LED
     wlan.connect(SSID, PSK)  # Attempt to connect to the Wi-Fi network
 
     while max_wait > 0:
-        if wlan.status() < 0 or wlan.status() >= 3:
+        status = wlan.status()
+        if status < 0 or status >= 3:
             break  # Exit loop if connected or if an error occurred
         max_wait -= 1
-        print('waiting for connection...')
-        time.sleep(1)  # Wait 1 second before retrying
+        time.sleep_ms(100)  # Wait 100 ms before checking again
 
     stop_network_led()  # Stop pulsing the LED
     network_led_pwm.duty_u16(30000)  # Set the LED to a moderate brightness
@@ -151,6 +190,6 @@ def file_exists(filename):
     :return: True if the file exists and is a regular file, False otherwise.
     """
     try:
-        return os.stat(filename)[0] & 0x8000  # Check for regular file (0x8000 indicates a regular file)
+        return os.stat(filename)[0] & _S_IFREG != 0  # Check for regular file
     except OSError:
         return False  # Return False if the file does not exist or if an error occurred
@@ -0,0 +1,56 @@
+"""
+    MicroPython SD Card Management
+
+    This script provides a shared, lazily mounted SD card for all apps of the Inky Frame.
+
+    The SPI bus and the SD card are only initialized on the first call of get_sd(), so apps that
+    never touch the SD card don't pay for it and apps that do share a single mount under /sd.
+
+    Functions:
+        - get_sd(): Mounts the SD card on first use and returns the SD card object or None on failure.
+"""
+
+import os
+import errno
+import sdcard
+
+from machine import Pin, SPI
+
+# SPI bus and SD card objects, created on the first call of get_sd().
+_spi = None
+_sd = None
+
+# Whether the SD card is currently mounted under /sd.
+_mounted = False
+
+def get_sd():
+    """
+    Mounts the SD card under /sd on the first call and returns the SD card object.
+
+    Subsequent calls return the already mounted SD card without touching the SPI bus again.
+
+    :return: The SDCard object, or None if the SD card could not be mounted.
+    """
+    global _spi, _sd, _mounted
+
+    if _mounted:
+        return _sd
+
+    try:
+        _spi = SPI(0, sck=Pin(18, Pin.OUT), mosi=Pin(19, Pin.OUT), miso=Pin(16, Pin.OUT))
+        _sd = sdcard.SDCard(_spi, Pin(22))
+
+        try:
+            os.mount(_sd, "/sd")
+        except OSError as e:
+            # MicroPython raises EPERM if something is already mounted under /sd, which is fine for us.
+            if e.errno != errno.EPERM:
+                raise
+
+        _mounted = True
+    except Exception as e:
+        print(f"Error mounting SD card: {e}")
+
+        _sd = None
+
+    return _sd